@@ -1,85 +1,214 @@
 import streamlit as st
 import pandas as pd
-import nltk
-from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import aiohttp
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import spacy
-from sklearn.feature_extraction.text import TfidfVectorizer
+from spacy.lang.en.stop_words import STOP_WORDS
 from pathlib import Path
-import json
+import orjson
 import re
 from datetime import datetime
+from collections import Counter
+from urllib.parse import urlparse
+import bulk_worker
 
-# Download required NLTK data
-nltk.download('punkt')
-nltk.download('averaged_perceptron_tagger')
-nltk.download('maxent_ne_chunker')
-nltk.download('words')
+# Pages larger than this are not analyzed
+MAX_BYTES = 5 * 1024 * 1024
 
-class SEOAuditor:
+_SANITIZE = re.compile(r'[^\w\-_.]')
+_WORD_RE = re.compile(r'[a-z]{3,}')
+_STOPS = frozenset(STOP_WORDS)
+
+def _normalize_text(text):
+    # Collapse whitespace without splitting words that span inline tags
+    return ' '.join(text.split())
+
+class PageAnalyzer:
+    def __init__(self):
+        # Only the tokenizer and rule-based sentence boundaries are used
+        self.nlp = spacy.load(
+            "en_core_web_sm",
+            exclude=["tok2vec", "tagger", "parser", "senter", "ner", "lemmatizer", "attribute_ruler"]
+        )
+        self.nlp.add_pipe("sentencizer")
+
+    def parse_and_score(self, html, url):
+        page = self.extract_content(html, url)
+        return self.score(url, page, self.nlp(page['text']))
+
+    def extract_content(self, html, url):
+        if HTMLParser is not None:
+            paragraphs, headings, anchors = self._extract_selectolax(html)
+        else:
+            paragraphs, headings, anchors = self._extract_lxml(html)
+        
+        # Extract text content
+        text = ' '.join(paragraphs)
+        
+        # Classify links, treating relative links and links to the same host as internal.
+        # Non-web links (mailto:, tel:, javascript:) and same-page fragments are skipped.
+        # Malformed URLs (e.g. unrendered '[[site_url]]' placeholders) make urlparse raise.
+        try:
+            domain = (urlparse(url).hostname or '').removeprefix('www.')
+        except ValueError:
+            domain = ''
+        links = []
+        for t, href in anchors:
+            try:
+                parsed = urlparse(href.strip())
+                host = (parsed.hostname or '').removeprefix('www.')
+            except ValueError:
+                continue
+            if parsed.scheme not in ('', 'http', 'https'):
+                continue
+            if not (parsed.netloc or parsed.path or parsed.query):
+                continue
+            links.append((t, href, host))
+        internal_links = [{'text': t, 'href': href} for t, href, host in links if host in ('', domain)]
+        external_links = [{'text': t, 'href': href} for t, href, host in links if host not in ('', domain)]
+        
+        return {
+            'text': text,
+            'headings': headings,
+            'internal_links': internal_links,
+            'external_links': external_links
+        }
+
+    def _extract_selectolax(self, html):
+        tree = HTMLParser(html)
+        paragraphs = [_normalize_text(p.text(deep=True)) for p in tree.css('p')]
+        headings = [_normalize_text(h.text(deep=True)) for h in tree.css('h1, h2, h3, h4, h5, h6')]
+        anchors = [
+            (_normalize_text(a.text(deep=True)), a.attributes.get('href') or '')
+            for a in tree.css('a[href]')
+        ]
+        return paragraphs, headings, anchors
+
+    def _extract_lxml(self, html):
+        # Collect paragraphs, headings and anchors in a single tree walk
+        paragraphs, headings, anchors = [], [], []
+        try:
+            root = lxml_html.fromstring(html)
+        except etree.ParserError:
+            # Blank bodies have no content, as with the selectolax path
+            return paragraphs, headings, anchors
+        for el in root.iter():
+            tag = el.tag
+            if tag == 'p':
+                paragraphs.append(_normalize_text(el.text_content()))
+            elif tag in ('h1', 'h2', 'h3', 'h4', 'h5', 'h6'):
+                headings.append(_normalize_text(el.text_content()))
+            elif tag == 'a' and 'href' in el.attrib:
+                anchors.append((_normalize_text(el.text_content()), el.attrib['href']))
+        return paragraphs, headings, anchors
+
+    def score(self, url, page, doc):
+        # Basic SEO metrics
+        word_count = sum(1 for token in doc if not token.is_space and not token.is_punct)
+        sentences = list(doc.sents)
+        avg_sentence_length = word_count / len(sentences) if sentences else 0
+        
+        # Count keywords of three or more letters, skipping stop words
+        keywords = Counter(w for w in _WORD_RE.findall(page['text'].lower()) if w not in _STOPS)
+        
+        # Keep the ten most frequent keywords
+        sorted_keywords = dict(keywords.most_common(10))
+        
+        return {
+            'url': url,
+            'analyzed_at': datetime.now().isoformat(),
+            'metrics': {
+                'word_count': word_count,
+                'avg_sentence_length': avg_sentence_length,
+                'num_headings': len(page['headings']),
+                'num_internal_links': len(page['internal_links']),
+                'num_external_links': len(page['external_links'])
+            },
+            'headings': page['headings'],
+            'internal_links': page['internal_links'],
+            'external_links': page['external_links'],
+            'top_keywords': sorted_keywords
+        }
+
+class SEOAuditor(PageAnalyzer):
     def __init__(self):
-        self.nlp = spacy.load("en_core_web_sm")
+        super().__init__()
+        # Reuse keep-alive connections for single-URL analyses
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=Retry(total=3, backoff_factor=0.3))
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        # ETag lookups are only a cache-key hint, so they use the default
+        # adapter (no retries) and give up quickly
+        self.head_session = requests.Session()
         self.results_dir = Path("results")
         self.results_dir.mkdir(exist_ok=True)
         
     def analyze_article(self, url):
         try:
-            response = requests.get(url)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Extract text content
-            text = ' '.join([p.text for p in soup.find_all('p')])
-            
-            # Basic SEO metrics
-            word_count = len(text.split())
-            sentences = nltk.sent_tokenize(text)
-            avg_sentence_length = word_count / len(sentences) if sentences else 0
-            
-            # Extract headings
-            headings = []
-            for i in range(1, 7):
-                headings.extend([h.text.strip() for h in soup.find_all(f'h{i}')])
-            
-            # Extract links
-            internal_links = []
-            external_links = []
-            domain = re.findall(r'https?://(?:www\.)?([^/]+)', url)[0]
-            
-            for a in soup.find_all('a', href=True):
-                link = {'text': a.text.strip(), 'href': a.get('href')}
-                if domain in link['href']:
-                    internal_links.append(link)
-                else:
-                    external_links.append(link)
-            
-            # Analyze keywords using spaCy
-            doc = self.nlp(text)
-            keywords = {}
-            for token in doc:
-                if not token.is_stop and token.is_alpha and len(token.text) > 2:
-                    keywords[token.text.lower()] = keywords.get(token.text.lower(), 0) + 1
-            
-            # Sort keywords by frequency
-            sorted_keywords = dict(sorted(keywords.items(), key=lambda x: x[1], reverse=True)[:10])
-            
-            return {
-                'url': url,
-                'analyzed_at': datetime.now().isoformat(),
-                'metrics': {
-                    'word_count': word_count,
-                    'avg_sentence_length': avg_sentence_length,
-                    'num_headings': len(headings),
-                    'num_internal_links': len(internal_links),
-                    'num_external_links': len(external_links)
-                },
-                'headings': headings,
-                'internal_links': internal_links,
-                'external_links': external_links,
-                'top_keywords': sorted_keywords
-            }
+            with self.session.get(url, timeout=30, stream=True) as response:
+                html = bytearray()
+                for chunk in response.iter_content(chunk_size=65536):
+                    html += chunk
+                    if len(html) > MAX_BYTES:
+                        return {'error': 'page too large'}
+            return self.parse_and_score(bytes(html), url)
         except Exception as e:
             return {'error': str(e)}
 
+    def fetch_etag(self, url):
+        try:
+            response = self.head_session.head(url, timeout=3, allow_redirects=True)
+            return response.headers.get('ETag')
+        except requests.RequestException:
+            return None
+
+    async def afetch(self, session, semaphore, url):
+        async with semaphore:
+            async with session.get(url) as response:
+                html = bytearray()
+                async for chunk in response.content.iter_chunked(65536):
+                    html += chunk
+                    if len(html) > MAX_BYTES:
+                        raise ValueError('page too large')
+                return bytes(html)
+
+    async def fetch_all(self, urls):
+        semaphore = asyncio.Semaphore(10)
+        # Per-phase timeouts, since a total budget would also count time spent
+        # queued behind limit_per_host for a connection
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=30)
+        # Bound per-host concurrency and cache DNS lookups across requests
+        connector = aiohttp.TCPConnector(limit_per_host=4, ttl_dns_cache=300)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            return await asyncio.gather(
+                *[self.afetch(session, semaphore, url) for url in urls],
+                return_exceptions=True
+            )
+
+    def run_bulk(self, urls, executor):
+        htmls = asyncio.run(self.fetch_all(urls))
+        results = [{'error': str(html)} if isinstance(html, Exception) else None for html in htmls]
+        fetched = [i for i, html in enumerate(htmls) if not isinstance(html, Exception)]
+        
+        # Parse and score the fetched pages in parallel across worker processes
+        analyses = executor.map(bulk_worker.process, [urls[i] for i in fetched], [htmls[i] for i in fetched])
+        for i, analysis in zip(fetched, analyses):
+            results[i] = analysis
+        return results
+
     def suggest_improvements(self, analysis):
         suggestions = []
         metrics = analysis['metrics']
@@ -132,21 +261,49 @@ class SEOAuditor:
 
     def save_analysis(self, analysis, approved=False):
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = re.sub(r'[^\w\-_.]', '_', analysis['url'])
+        filename = _SANITIZE.sub('_', analysis['url'])
         status = 'approved' if approved else 'pending'
         output_file = self.results_dir / f"{filename}_{status}_{timestamp}.json"
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(analysis, f, indent=2, ensure_ascii=False)
+        output_file.write_bytes(orjson.dumps(analysis, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
         
         return output_file
 
+@st.cache_resource
+def get_auditor():
+    return SEOAuditor()
+
+# Workers load their own spaCy model once, so the pool is kept across reruns.
+# spawn avoids forking Streamlit's threads into the workers.
+@st.cache_resource
+def get_executor():
+    return ProcessPoolExecutor(
+        max_workers=os.cpu_count(),
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=bulk_worker.init_worker
+    )
+
+# etag is only part of the cache key, so a changed page is re-analyzed.
+# Errors are raised rather than returned so they are not cached.
+@st.cache_data(ttl=3600, max_entries=512)
+def _analyze(url, etag):
+    analysis = get_auditor().analyze_article(url)
+    if 'error' in analysis:
+        raise RuntimeError(analysis['error'])
+    return analysis
+
+def analyze_url(url):
+    try:
+        return _analyze(url, get_auditor().fetch_etag(url))
+    except RuntimeError as e:
+        return {'error': str(e)}
+
 def main():
     st.set_page_config(page_title="SEO Audit Tool", layout="wide")
     st.title("SEO Audit Tool")
     
     # Initialize SEO Auditor
-    auditor = SEOAuditor()
+    auditor = get_auditor()
     
     # Input methods
     input_method = st.radio(
@@ -158,7 +315,7 @@ def main():
         url = st.text_input("Enter URL to analyze:")
         if url and st.button("Analyze"):
             with st.spinner("Analyzing..."):
-                analysis = auditor.analyze_article(url)
+                analysis = analyze_url(url)
                 if 'error' in analysis:
                     st.error(f"Error: {analysis['error']}")
                 else:
@@ -167,16 +324,24 @@ def main():
     elif input_method == "Bulk URLs":
         urls = st.text_area("Enter URLs (one per line):")
         if urls and st.button("Analyze All"):
-            urls_list = urls.split('\n')
-            for url in urls_list:
-                if url.strip():
-                    with st.spinner(f"Analyzing {url}..."):
-                        analysis = auditor.analyze_article(url.strip())
-                        if 'error' in analysis:
-                            st.error(f"Error analyzing {url}: {analysis['error']}")
-                        else:
-                            display_analysis(analysis, auditor)
-                            st.markdown("---")
+            urls_list = [url.strip() for url in urls.split('\n') if url.strip()]
+            with st.spinner(f"Analyzing {len(urls_list)} URLs..."):
+                executor = get_executor()
+                try:
+                    analyses = auditor.run_bulk(urls_list, executor)
+                except BrokenProcessPool as e:
+                    # A worker died (e.g. out of memory or no spaCy model), so drop
+                    # the cached pool and let the next run start a fresh one
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    get_executor.clear()
+                    error = str(e) or 'analysis worker process failed'
+                    analyses = [{'error': error} for _ in urls_list]
+            for url, analysis in zip(urls_list, analyses):
+                if 'error' in analysis:
+                    st.error(f"Error analyzing {url}: {analysis['error']}")
+                else:
+                    display_analysis(analysis, auditor)
+                    st.markdown("---")
     
     elif input_method == "Local Files":
         st.warning("Feature coming soon: Local file analysis")
@@ -202,22 +367,20 @@ def display_analysis(analysis, auditor):
     
     # Display keywords
     st.subheader("Top Keywords")
-    keywords_df = pd.DataFrame(
-        list(analysis['top_keywords'].items()),
-        columns=['Keyword', 'Frequency']
-    )
+    keywords_df = pd.DataFrame({
+        'Keyword': list(analysis['top_keywords']),
+        'Frequency': list(analysis['top_keywords'].values())
+    })
     st.dataframe(keywords_df)
     
     # Display links
     col1, col2 = st.columns(2)
     with col1:
         st.subheader(f"Internal Links ({len(analysis['internal_links'])})")
-        for link in analysis['internal_links']:
-            st.write(f"- [{link['text']}]({link['href']})")
+        display_links(analysis['internal_links'])
     with col2:
         st.subheader(f"External Links ({len(analysis['external_links'])})")
-        for link in analysis['external_links']:
-            st.write(f"- [{link['text']}]({link['href']})")
+        display_links(analysis['external_links'])
     
     # Display suggestions
     st.subheader("Improvement Suggestions")
@@ -237,5 +400,16 @@ def display_analysis(analysis, auditor):
             file_path = auditor.save_analysis(analysis, approved=True)
             st.success(f"Analysis approved and saved to {file_path}")
 
+def display_links(links):
+    if links:
+        st.dataframe(
+            pd.DataFrame(links),
+            column_config={
+                'text': 'Text',
+                'href': st.column_config.LinkColumn('URL')
+            },
+            hide_index=True
+        )
+
 if __name__ == "__main__":
     main()
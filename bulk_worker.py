@@ -0,0 +1,18 @@
+"""Process-pool helpers for analyzing bulk URLs in parallel.
+
+These live outside app.py because Streamlit runs the app script as
+__main__, which worker processes cannot import functions from.
+"""
+
+_analyzer = None
+
+def init_worker():
+    global _analyzer
+    from app import PageAnalyzer
+    _analyzer = PageAnalyzer()
+
+def process(url, html):
+    try:
+        return _analyzer.parse_and_score(html, url)
+    except Exception as e:
+        return {'error': str(e)}